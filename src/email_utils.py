@@ -0,0 +1,116 @@
+"""
+邮件工具 - 收件人地址校验与去重、批量发送结果日志
+供 Resend / SMTP 发送模块共用
+"""
+import logging
+from email.utils import parseaddr
+from typing import Dict, Iterable, List
+
+# 本地部分允许的字符（RFC 5322 atext 加上 "."）
+_LOCAL_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    ".!#$%&'*+-/=?^_`{|}~"
+)
+# 域名部分允许的字符
+_DOMAIN_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.-"
+)
+
+
+def is_plausible_addr(addr: str) -> bool:
+    """
+    快速判断地址是否大致像邮箱：最后一个 "@" 前非空，且其后的域名含 "."
+
+    只做 rfind 和一次域名切片，替代 "'@' in addr and '.' in addr" 的两次全串扫描，
+    同时拒绝 "@." 这类明显无效的地址
+
+    Args:
+        addr: 邮箱地址
+
+    Returns:
+        地址是否大致有效
+    """
+    at_idx = addr.rfind('@')
+    return at_idx > 0 and len(addr) - at_idx > 3 and '.' in addr[at_idx + 1:]
+
+
+def is_valid_email(addr: str) -> bool:
+    """
+    校验纯邮箱地址（不含显示名和尖括号）
+
+    先用 is_plausible_addr 快速筛掉明显无效的地址，再检查：
+    - 恰好一个 "@"（本地部分的 "@" 不在允许字符内）
+    - 域名中的 "." 不紧跟 "@"、不在末尾
+    - 本地部分和域名只含允许字符，非 ASCII 字符视为合法（国际化地址）
+
+    字符检查使用 frozenset.issuperset 在 C 层完成，不逐字符执行 Python 代码
+
+    Args:
+        addr: 邮箱地址
+
+    Returns:
+        地址格式是否有效
+    """
+    if not is_plausible_addr(addr):
+        return False
+
+    at_idx = addr.rfind('@')
+    local, domain = addr[:at_idx], addr[at_idx + 1:]
+    if domain[0] == '.' or domain[-1] == '.':
+        return False
+
+    if not addr.isascii():
+        local = ''.join(ch for ch in local if ch <= '\x7f')
+        domain = ''.join(ch for ch in domain if ch <= '\x7f')
+    return _LOCAL_CHARS.issuperset(local) and _DOMAIN_CHARS.issuperset(domain)
+
+
+def _dedup_key(recipient: str) -> str:
+    """去重键：提取地址并将域名转为小写（RFC 5321 域名不区分大小写）"""
+    addr = parseaddr(recipient)[1] if '<' in recipient else recipient
+    at_idx = addr.rfind('@')
+    return addr[:at_idx + 1] + addr[at_idx + 1:].lower()
+
+
+def dedup_recipients(recipients: Iterable[str]) -> List[str]:
+    """
+    收件人去重，保留首次出现的写法和原始顺序
+
+    同一地址仅域名大小写不同（如 user@Example.com / user@example.com）视为重复
+
+    Args:
+        recipients: 收件人列表，元素可以是 "addr" 或 "Name <addr>"
+
+    Returns:
+        去重后的收件人列表
+    """
+    unique: Dict[str, str] = {}
+    for recipient in recipients:
+        unique.setdefault(_dedup_key(recipient), recipient)
+    return list(unique.values())
+
+
+def log_batch_results(logger: logging.Logger, results: List[Dict]) -> None:
+    """在 DEBUG 级别逐条输出批量发送结果"""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    for result in results:
+        if result["success"]:
+            logger.debug("  ✅ %s: 发送成功", result["email"])
+        else:
+            logger.debug("  ❌ %s: 发送失败 - %s", result["email"], result["message"])
+
+
+def log_batch_summary(logger: logging.Logger, results: List[Dict]) -> None:
+    """
+    输出批量发送汇总：一条成功统计，失败时再附一条失败明细
+
+    Args:
+        logger: 调用方模块的 logger，日志按发送模块归属
+        results: 每个收件人的发送结果（含 success / email / message）
+    """
+    failures = [(r["email"], r["message"]) for r in results if not r["success"]]
+    logger.info("📊 批量发送完成: 成功 %d/%d", len(results) - len(failures), len(results))
+    if failures:
+        logger.warning("   发送失败: %r", failures)
+    log_batch_results(logger, results)
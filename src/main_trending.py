@@ -3,6 +3,7 @@
 Skills Trending 主入口
 自动获取 skills.sh 技能排行榜，AI 分析，生成趋势报告并发送邮件
 """
+import logging
 import sys
 import os
 from datetime import datetime, timezone
@@ -56,6 +57,9 @@ def get_today_date() -> str:
 
 def main():
     """主函数"""
+    # 邮件发送模块通过 logging 输出进度
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
     print_banner()
 
     # 检查环境变量
@@ -3,8 +3,71 @@ Resend Sender - Resend 邮件发送
 使用 Resend API 发送 HTML 邮件
 支持多个收件人（逗号分隔或列表）
 """
-import resend
-from typing import Dict, List, Union, Optional
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parseaddr
+from functools import lru_cache
+from typing import Dict, Iterator, List, Union, Optional
+
+from src.email_utils import dedup_recipients, is_valid_email, log_batch_summary
+
+RESEND_API_URL = "https://api.resend.com/emails"
+# 批量单独发送时的最大并发请求数（线程池回退路径）
+# 请求速率由 MAX_REQUESTS_PER_SECOND 控制，更多线程只会排队等待
+MAX_SEND_WORKERS = 4
+# 异步批量发送时同时进行的最大请求数
+MAX_CONCURRENT_REQUESTS = 16
+# 客户端限速：每秒最多发出的请求数（Resend 账户默认限制为 2 次/秒）
+MAX_REQUESTS_PER_SECOND = 2
+# 遇到 HTTP 429 时的最大重试次数
+RATE_LIMIT_MAX_RETRIES = 3
+# 响应未给出 retry-after 时的首次退避时间（秒），之后每次翻倍
+RATE_LIMIT_BACKOFF = 1.0
+
+log = logging.getLogger(__name__)
+
+
+class _RateLimiter:
+    """
+    按固定间隔发放请求时间片，线程安全
+
+    reserve() 只计算需要等待的秒数，由调用方自行 time.sleep 或 asyncio.sleep，
+    因此同一个限速器可同时用于线程池和异步发送
+    """
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """预约下一个时间片，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self._interval
+            return slot - now
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """判断 SDK 异常是否为限流（HTTP 429 / rate_limit_exceeded）"""
+    return (
+        str(getattr(error, "code", "")) == "429"
+        or getattr(error, "error_type", None) == "rate_limit_exceeded"
+    )
+
+
+def _retry_delay(retry_after: Optional[str], attempt: int) -> float:
+    """429 重试等待时间：优先使用 retry-after（秒），否则指数退避"""
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass
+    return RATE_LIMIT_BACKOFF * (2 ** attempt)
 
 
 class ResendSender:
@@ -18,9 +81,37 @@ class ResendSender:
             api_key: Resend API Key
         """
         self.api_key = api_key
-        resend.api_key = api_key
+        # 延迟导入：resend 会连带加载 requests/urllib3 等模块，只在真正使用时才导入
+        import resend as _resend
+        self._resend = _resend
+        _resend.api_key = api_key
+        self._rate_limiter = _RateLimiter(MAX_REQUESTS_PER_SECOND)
+
+    def _sdk_send(self, params: Dict) -> Dict:
+        """
+        通过 SDK 发送，按 MAX_REQUESTS_PER_SECOND 限速，遇到限流时退避重试
+
+        resend.api_key 是全局的，发送前确保是当前实例的 key
+        """
+        attempt = 0
+        while True:
+            time.sleep(self._rate_limiter.reserve())
+            if self._resend.api_key != self.api_key:
+                self._resend.api_key = self.api_key
+            try:
+                return self._resend.Emails.send(params)
+            except Exception as e:
+                if not _is_rate_limited(e) or attempt >= RATE_LIMIT_MAX_RETRIES:
+                    raise
+                # SDK 不暴露 retry-after 头，使用指数退避
+                time.sleep(_retry_delay(None, attempt))
+                attempt += 1
 
-    def _parse_recipients(self, to: Union[str, List[str]]) -> List[str]:
+    def _parse_recipients(
+        self,
+        to: Union[str, List[str]],
+        validated: bool = False
+    ) -> List[str]:
         """
         解析收件人列表
 
@@ -30,38 +121,52 @@ class ResendSender:
                 - 逗号分隔: "user1@example.com, user2@example.com"
                 - 分号分隔: "user1@example.com; user2@example.com"
                 - 列表: ["user1@example.com", "user2@example.com"]
+            validated: 调用方已保证地址有效时传 True，跳过格式校验；
+                to 为列表时直接原样使用
 
         Returns:
-            收件人邮箱列表
+            去重后的收件人邮箱列表（保持原始顺序）
         """
+        if validated and not isinstance(to, str):
+            recipients = list(to)
+        else:
+            recipients = list(self._iter_recipients(to, validated))
+
+        unique = dedup_recipients(recipients)
+        if len(unique) < len(recipients):
+            log.debug("已去除 %d 个重复收件人", len(recipients) - len(unique))
+        return unique
+
+    @staticmethod
+    def _iter_recipients(to: Union[str, List[str]], validated: bool = False) -> Iterator[str]:
+        """逐个产出有效收件人，分割、去空白和校验在同一次遍历中完成"""
         if isinstance(to, str):
-            # 先尝试逗号分割，再尝试分号分割
-            if ',' in to:
-                recipients = [email.strip() for email in to.split(',') if email.strip()]
-            elif ';' in to:
-                recipients = [email.strip() for email in to.split(';') if email.strip()]
-            else:
-                recipients = [to.strip()]
+            # 逗号和分号统一为逗号，一次 split 得到全部片段
+            tokens = to.replace(';', ',').split(',')
         else:
-            # 如果是列表，直接使用
-            recipients = [email.strip() for email in to if email.strip()]
-
-        # 过滤空值和无效邮箱
-        valid_recipients = []
-        for email in recipients:
-            if email and '@' in email and '.' in email:
-                valid_recipients.append(email)
+            tokens = to
+
+        for token in tokens:
+            email = token.strip()
+            if not email:
+                continue
+            if '<' in email:
+                # "Name <addr>" 形式，校验尖括号内的地址
+                addr = parseaddr(email)[1]
             else:
-                print(f"⚠️  跳过无效邮箱格式: {email}")
-
-        return valid_recipients
+                addr = email
+            if validated or is_valid_email(addr):
+                yield email
+            else:
+                log.warning("⚠️  跳过无效邮箱格式: %s", email)
 
     def send_email(
         self,
         to: Union[str, List[str]],
         subject: str,
         html_content: str,
-        from_email: str = "onboarding@resend.dev"
+        from_email: str = "onboarding@resend.dev",
+        validated: bool = False
     ) -> Dict:
         """
         发送邮件到多个收件人
@@ -75,12 +180,13 @@ class ResendSender:
             subject: 邮件标题
             html_content: HTML 内容
             from_email: 发件人邮箱
+            validated: 收件人已校验时传 True，跳过地址格式校验
 
         Returns:
             {"success": bool, "message": str, "id": str, "recipients": List[str]}
         """
         # 解析收件人
-        recipients = self._parse_recipients(to)
+        recipients = self._parse_recipients(to, validated)
 
         if not recipients:
             return {
@@ -91,9 +197,9 @@ class ResendSender:
             }
 
         try:
-            print(f"📧 正在发送邮件到 {len(recipients)} 个收件人:")
+            log.info("📧 正在发送邮件到 %d 个收件人", len(recipients))
             for i, email in enumerate(recipients, 1):
-                print(f"  {i}. {email}")
+                log.debug("  %d. %s", i, email)
 
             # Resend API 支持直接传列表
             params = {
@@ -103,10 +209,9 @@ class ResendSender:
                 "html": html_content,
             }
 
-            response = resend.Emails.send(params)
+            response = self._sdk_send(params)
 
-            print(f"✅ 邮件发送成功! ID: {response.get('id')}")
-            print(f"   收件人: {len(recipients)} 个")
+            log.info("✅ 邮件发送成功! ID: %s, 收件人: %d 个", response.get("id"), len(recipients))
 
             return {
                 "success": True,
@@ -118,7 +223,7 @@ class ResendSender:
 
         except Exception as e:
             error_msg = str(e)
-            print(f"❌ 邮件发送失败: {error_msg}")
+            log.error("❌ 邮件发送失败: %s", error_msg)
 
             return {
                 "success": False,
@@ -132,7 +237,8 @@ class ResendSender:
         to: Union[str, List[str]],
         subject: str,
         html_content: str,
-        from_email: str = "onboarding@resend.dev"
+        from_email: str = "onboarding@resend.dev",
+        validated: bool = False
     ) -> List[Dict]:
         """
         批量单独发送（每个收件人单独发送一封邮件）
@@ -144,56 +250,192 @@ class ResendSender:
             subject: 邮件标题
             html_content: HTML 内容
             from_email: 发件人邮箱
+            validated: 收件人已校验时传 True，跳过地址格式校验
 
         Returns:
             每个收件人的发送结果列表
         """
-        recipients = self._parse_recipients(to)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # 当前没有运行中的事件循环，使用异步并发发送
+            return asyncio.run(
+                self.send_batch_separate_async(to, subject, html_content, from_email, validated)
+            )
+
+        # 已处于事件循环中（无法 asyncio.run），回退到线程池发送
+        return self._send_batch_threaded(to, subject, html_content, from_email, validated)
+
+    async def send_batch_separate_async(
+        self,
+        to: Union[str, List[str]],
+        subject: str,
+        html_content: str,
+        from_email: str = "onboarding@resend.dev",
+        validated: bool = False
+    ) -> List[Dict]:
+        """
+        异步批量单独发送
+
+        通过单个 HTTP/2 连接并发调用 Resend API，并发数受 MAX_CONCURRENT_REQUESTS 限制
+
+        Args:
+            to: 收件人邮箱（支持多种格式）
+            subject: 邮件标题
+            html_content: HTML 内容
+            from_email: 发件人邮箱
+            validated: 收件人已校验时传 True，跳过地址格式校验
+
+        Returns:
+            每个收件人的发送结果列表（与收件人顺序一致）
+        """
+        recipients = self._parse_recipients(to, validated)
 
         if not recipients:
-            print("⚠️  没有有效的收件人邮箱")
+            log.warning("⚠️  没有有效的收件人邮箱")
             return []
 
-        results = []
-        success_count = 0
+        log.info("📧 开始批量单独发送，共 %d 个收件人...", len(recipients))
 
-        print(f"📧 开始批量单独发送，共 {len(recipients)} 个收件人...")
+        base_params = self._build_base_params(subject, html_content, from_email)
+        payloads = [{**base_params, "to": [email]} for email in recipients]
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        import httpx  # 仅异步批量发送需要，延迟导入
 
-        for email in recipients:
+        async def post_one(client: httpx.AsyncClient, payload: Dict) -> Dict:
+            email = payload["to"][0]
             try:
-                params = {
-                    "from": from_email,
-                    "to": [email],  # 每次只发送给一个人
-                    "subject": subject,
-                    "html": html_content,
-                }
-
-                response = resend.Emails.send(params)
-
-                result = {
+                attempt = 0
+                while True:
+                    async with semaphore:
+                        await asyncio.sleep(self._rate_limiter.reserve())
+                        response = await client.post(RESEND_API_URL, json=payload)
+                    if response.status_code != 429 or attempt >= RATE_LIMIT_MAX_RETRIES:
+                        break
+                    # 触发限流：按 retry-after 等待后重试
+                    await asyncio.sleep(_retry_delay(response.headers.get("retry-after"), attempt))
+                    attempt += 1
+
+                if not response.is_success:
+                    raise RuntimeError(self._http_error_message(response))
+                data = response.json()
+                return {
                     "success": True,
                     "email": email,
-                    "id": response.get("id"),
+                    "id": data.get("id"),
                     "message": "发送成功"
                 }
-                success_count += 1
-                print(f"  ✅ {email}: 发送成功")
-
             except Exception as e:
-                result = {
+                return {
                     "success": False,
                     "email": email,
                     "id": None,
                     "message": str(e)
                 }
-                print(f"  ❌ {email}: 发送失败 - {str(e)}")
 
-            results.append(result)
+        async with httpx.AsyncClient(
+            http2=True,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=30
+        ) as client:
+            results = await asyncio.gather(*[post_one(client, p) for p in payloads])
 
-        print(f"📊 批量发送完成: 成功 {success_count}/{len(recipients)}")
+        results = list(results)
+        log_batch_summary(log, results)
 
         return results
 
+    @staticmethod
+    def _http_error_message(response) -> str:
+        """从失败响应中提取错误信息；响应体不是 JSON 时只返回状态码"""
+        try:
+            message = response.json().get("message")
+        except ValueError:
+            message = None
+        if message:
+            return f"HTTP {response.status_code}: {message}"
+        return f"HTTP {response.status_code}"
+
+    def _send_batch_threaded(
+        self,
+        to: Union[str, List[str]],
+        subject: str,
+        html_content: str,
+        from_email: str,
+        validated: bool = False
+    ) -> List[Dict]:
+        """通过 Resend SDK 和线程池批量单独发送"""
+        recipients = self._parse_recipients(to, validated)
+
+        if not recipients:
+            log.warning("⚠️  没有有效的收件人邮箱")
+            return []
+
+        results: List[Optional[Dict]] = [None] * len(recipients)
+
+        log.info("📧 开始批量单独发送，共 %d 个收件人...", len(recipients))
+
+        base_params = self._build_base_params(subject, html_content, from_email)
+        max_workers = min(MAX_SEND_WORKERS, len(recipients))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._send_one, email, base_params): i
+                for i, email in enumerate(recipients)
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+        log_batch_summary(log, results)
+
+        # 按收件人原始顺序返回
+        return results
+
+    @staticmethod
+    def _build_base_params(subject: str, html_content: str, from_email: str) -> Dict:
+        """构建批量发送时所有收件人共用的请求参数（不含 to）"""
+        return {
+            "from": from_email,
+            "subject": subject,
+            "html": html_content,
+        }
+
+    def _send_one(self, email: str, base_params: Dict) -> Dict:
+        """
+        发送单封邮件给一个收件人，返回发送结果
+
+        base_params 会被多个线程同时读取，这里只浅拷贝并替换 to，不修改原字典
+        """
+        try:
+            params = {**base_params, "to": [email]}  # 每次只发送给一个人
+
+            response = self._sdk_send(params)
+
+            return {
+                "success": True,
+                "email": email,
+                "id": response.get("id"),
+                "message": "发送成功"
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "email": email,
+                "id": None,
+                "message": str(e)
+            }
+
+
+@lru_cache(maxsize=16)
+def _get_resend_sender(api_key: str) -> ResendSender:
+    """
+    按 api_key 缓存 ResendSender
+
+    ResendSender 本身不保存发送状态，可在多线程间共享；但 resend SDK 的 api_key
+    是模块级全局变量，多线程同时使用不同 api_key 走 SDK 发送时仍可能互相覆盖
+    """
+    return ResendSender(api_key)
+
 
 def send_email(
     api_key: str,
@@ -202,6 +444,5 @@ def send_email(
     html_content: str,
     from_email: str = "onboarding@resend.dev"
 ) -> Dict:
-    """便捷函数：发送邮件到多个收件人"""
-    sender = ResendSender(api_key)
-    return sender.send_email(to, subject, html_content, from_email)
+    """便捷函数：发送邮件到多个收件人（同一 api_key 复用同一个 ResendSender）"""
+    return _get_resend_sender(api_key).send_email(to, subject, html_content, from_email)
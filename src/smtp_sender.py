@@ -3,18 +3,428 @@ SMTP Sender - SMTP 邮件发送
 使用 SMTP 发送 HTML 邮件，支持腾讯邮箱等
 支持多个收件人（逗号分隔或列表）
 """
+import atexit
+import copy
+import logging
+import queue
+import re
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import socket
+import threading
+import time
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from email.header import Header
+from email.message import EmailMessage, Message
 from email.utils import parseaddr, formataddr
-from typing import Dict, List, Union, Optional
+from typing import Callable, Dict, Iterator, List, Union, Optional, Tuple
+
+from src.email_utils import dedup_recipients, is_plausible_addr, is_valid_email, log_batch_summary
+
+# 单个 SMTP 会话最多发送的邮件数，超过后重新建立连接
+MAX_MESSAGES_PER_SESSION = 100
+# 每个 (host, port, user) 最多同时保持的连接数
+MAX_CONNECTIONS_PER_KEY = 5
+# 空闲连接超过该秒数后被回收
+IDLE_TIMEOUT = 100
+# SMTPS（隐式 TLS）端口，使用 SMTP_SSL 直接建立加密连接，省去 STARTTLS 往返
+SMTPS_PORT = 465
+# SMTP 连接超时（秒）
+SMTP_TIMEOUT = 30
+
+PoolKey = Tuple[str, int, str]
+
+log = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=256)
+def _encode_subject(subject: str, linesep: str) -> str:
+    """RFC 2047 编码并折行邮件标题，同一标题只编码一次"""
+    return Header(subject, 'utf-8', header_name='Subject').encode(linesep=linesep)
+
+
+class _SubjectHeader(str):
+    """
+    按 email.header.Header 规则编码的 Subject 头部
+
+    policy.SMTP 自带的折行在两个 encoded-word 之间断行时会丢掉原有的空格
+    （如较长的中文标题），这里由 fold() 自行输出编码结果
+    """
+
+    name = 'Subject'
+
+    def fold(self, *, policy) -> str:
+        return f"{self.name}: {_encode_subject(str(self), policy.linesep)}{policy.linesep}"
+
+
+@lru_cache(maxsize=None)
+def _smtp_policy():
+    """延迟加载 email.policy（连带 headerregistry 等模块），首次构建邮件时才导入"""
+    from email import policy
+    return policy.SMTP
+
+
+def _build_message(
+    formatted_from: str,
+    subject: str,
+    html_content: str,
+    to: Optional[str] = None
+) -> EmailMessage:
+    """
+    构建 HTML 邮件
+
+    使用 EmailMessage + policy.SMTP：标题等头部在序列化时按 RFC 2047 编码，
+    输出直接为 CRLF 换行；正文使用 base64，不依赖服务器的 8BITMIME 支持
+    """
+    msg = EmailMessage(policy=_smtp_policy())
+    msg['From'] = formatted_from
+    if to is not None:
+        msg['To'] = to
+    msg['Subject'] = _SubjectHeader(subject)
+    msg.set_content(html_content, subtype='html', charset='utf-8', cte='base64')
+    return msg
+
+
+@lru_cache(maxsize=256)
+def _parse_from(from_email: str) -> Tuple[Optional[str], str]:
+    """
+    解析发件人，结果按 from_email 缓存
+
+    Returns:
+        (格式化后的 From 头部, 发件人地址)，发件人无效时前者为 None
+    """
+    name, addr = parseaddr(from_email)
+    if not is_plausible_addr(addr):
+        return None, addr
+    if name:
+        return formataddr((name, addr), charset='utf-8'), addr
+    return addr, addr
+
+
+def _close_quietly(server: smtplib.SMTP) -> None:
+    """关闭 SMTP 连接，忽略关闭过程中的异常"""
+    try:
+        server.quit()
+    except Exception:
+        server.close()
+
+
+def _reset_quietly(server: smtplib.SMTP) -> None:
+    """发送 RSET 恢复会话状态，忽略连接已断开的情况"""
+    try:
+        server.rset()
+    except smtplib.SMTPServerDisconnected:
+        pass
+
+
+def _sendall(server: smtplib.SMTP, data: bytes) -> None:
+    """
+    直接写 socket，与 smtplib.SMTP.send 一样把 socket 错误转换为 SMTPServerDisconnected
+
+    复用的连接可能已被服务器关闭，转换后由连接池丢弃并走重连路径
+    """
+    if server.sock is None:
+        raise smtplib.SMTPServerDisconnected("please run connect() first")
+    try:
+        server.sock.sendall(data)
+    except OSError as e:
+        server.close()
+        raise smtplib.SMTPServerDisconnected(f"Server not connected: {e}") from e
+
+
+def _send_pipelined(
+    server: smtplib.SMTP,
+    msg: bytes,
+    from_addr: str,
+    to_addrs: List[str]
+) -> Dict[str, Tuple[int, bytes]]:
+    """
+    使用 PIPELINING 扩展（RFC 2920）发送邮件
+
+    MAIL FROM、全部 RCPT TO 和 DATA 一次写出，再依次读取响应，
+    把逐条等待的 N+2 次往返合并为一次。语义与 smtplib.SMTP.sendmail 一致
+
+    Returns:
+        被拒绝的收件人 {地址: (响应码, 响应内容)}
+    """
+    commands = [f"MAIL FROM:{smtplib.quoteaddr(from_addr)}"]
+    commands.extend(f"RCPT TO:{smtplib.quoteaddr(addr)}" for addr in to_addrs)
+    commands.append("DATA")
+    _sendall(server, "".join(f"{cmd}\r\n" for cmd in commands).encode("ascii"))
+
+    # 无论中途是否出错都要读完全部响应，保持会话同步
+    mail_code, mail_resp = server.getreply()
+    rcpt_replies = [server.getreply() for _ in to_addrs]
+    data_code, data_resp = server.getreply()
+
+    refused = {
+        addr: reply for addr, reply in zip(to_addrs, rcpt_replies)
+        if reply[0] not in (250, 251)
+    }
+    failed = mail_code != 250 or len(refused) == len(to_addrs)
+
+    if data_code == 354 and failed:
+        # 服务器仍接受了 DATA，发送空内容结束本次事务
+        _sendall(server, b".\r\n")
+        server.getreply()
+    if mail_code != 250:
+        _reset_quietly(server)
+        raise smtplib.SMTPSenderRefused(mail_code, mail_resp, from_addr)
+    if failed:
+        _reset_quietly(server)
+        raise smtplib.SMTPRecipientsRefused(refused)
+    if data_code != 354:
+        _reset_quietly(server)
+        raise smtplib.SMTPDataError(data_code, data_resp)
+
+    data = re.sub(br"(?m)^\.", b"..", msg)
+    if not data.endswith(b"\r\n"):
+        data += b"\r\n"
+    _sendall(server, data + b".\r\n")
+    code, resp = server.getreply()
+    if code != 250:
+        _reset_quietly(server)
+        raise smtplib.SMTPDataError(code, resp)
+    return refused
+
+
+class _PreResolvedSMTP(smtplib.SMTP):
+    """
+    使用预先解析的地址建立连接的 SMTP，跳过每次连接时的 DNS 查询
+
+    resolve 为返回 getaddrinfo 结果的回调，refresh=True 时重新解析；
+    用缓存地址连接失败时会刷新一次缓存再重试
+    """
+
+    resolve: Optional[Callable[[bool], Optional[list]]] = None
+
+    def connect(self, host='localhost', port=0, source_address=None):
+        # smtplib 只在 __init__ 中记录 _host；这里先构造再 connect，需自行设置，
+        # 否则 starttls()/SMTP_SSL 以空的 server_hostname 调用 wrap_socket（同时丢失 SNI）
+        self._host = host
+        return super().connect(host, port, source_address)
+
+    def _connect_addrinfo(self, addrinfo: list, timeout) -> socket.socket:
+        last_error: Optional[OSError] = None
+        for family, socktype, proto, _, sockaddr in addrinfo:
+            sock = socket.socket(family, socktype, proto)
+            try:
+                if timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    sock.settimeout(timeout)
+                if self.source_address:
+                    sock.bind(self.source_address)
+                sock.connect(sockaddr)
+                return sock
+            except OSError as e:
+                last_error = e
+                sock.close()
+        raise last_error or OSError("getaddrinfo 返回空列表")
+
+    def _get_socket(self, host, port, timeout):
+        addrinfo = self.resolve(False) if self.resolve else None
+        if not addrinfo:
+            return super()._get_socket(host, port, timeout)
+        try:
+            return self._connect_addrinfo(addrinfo, timeout)
+        except OSError:
+            # 缓存的地址可能已失效，重新解析后重试一次
+            addrinfo = self.resolve(True)
+            if not addrinfo:
+                raise
+            return self._connect_addrinfo(addrinfo, timeout)
+
+
+class _PreResolvedSMTP_SSL(smtplib.SMTP_SSL, _PreResolvedSMTP):
+    """隐式 TLS 版本：SMTP_SSL 在 _PreResolvedSMTP 建立的 socket 上做 TLS 握手"""
+
+
+def _is_connection_lost(error: BaseException) -> bool:
+    """
+    判断异常是否意味着连接已不可用，需要换新连接重试
+
+    包括连接断开、socket 错误，以及服务器以 421 关闭会话（如空闲超时）；
+    其余 SMTP 错误（收件人被拒等）发生后会话已 RSET，仍可继续使用
+    """
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        return bool(codes) and all(code == 421 for code in codes)
+    if isinstance(error, smtplib.SMTPException):
+        return False
+    return isinstance(error, OSError)
+
+
+class _PooledConnection:
+    """连接池中的单个已登录连接"""
+
+    def __init__(self, key: PoolKey, server: smtplib.SMTP):
+        self.key = key
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """
+    进程级 SMTP 连接池
+
+    按 (smtp_host, smtp_port, smtp_user) 复用已完成 TLS 和登录的连接，
+    避免每封邮件都重新握手和认证
+    """
+
+    _instance: Optional["SMTPConnectionPool"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS_PER_KEY,
+        max_messages: int = MAX_MESSAGES_PER_SESSION,
+        idle_timeout: float = IDLE_TIMEOUT
+    ):
+        """
+        初始化
+
+        Args:
+            max_connections: 每个 key 最多同时借出的连接数
+            max_messages: 单个连接最多发送的邮件数，超过后关闭重建
+            idle_timeout: 空闲连接的最长保留时间（秒）
+        """
+        self.max_connections = max_connections
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle: Dict[PoolKey, "queue.LifoQueue[_PooledConnection]"] = {}
+        self._slots: Dict[PoolKey, threading.BoundedSemaphore] = {}
+        self._reaper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def instance(cls) -> "SMTPConnectionPool":
+        """获取全局共享的连接池"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                atexit.register(cls._instance.close_all)
+            return cls._instance
+
+    def _queues(self, key: PoolKey):
+        with self._lock:
+            if key not in self._idle:
+                self._idle[key] = queue.LifoQueue()
+                self._slots[key] = threading.BoundedSemaphore(self.max_connections)
+            if self._reaper is None:
+                self._stop.clear()
+                self._reaper = threading.Thread(
+                    target=self._reap_loop, name="smtp-pool-reaper", daemon=True
+                )
+                self._reaper.start()
+            return self._idle[key], self._slots[key]
+
+    def acquire(
+        self,
+        key: PoolKey,
+        connect: Callable[[], smtplib.SMTP],
+        fresh: bool = False
+    ) -> _PooledConnection:
+        """
+        借出一个已登录的连接，没有空闲连接时调用 connect 新建
+
+        连接数达到上限时阻塞，直到其他调用方归还
+
+        Args:
+            key: 连接池 key
+            connect: 新建已登录连接的回调
+            fresh: 为 True 时关闭该 key 下所有空闲连接并新建连接
+                （服务器刚断开过会话，其余空闲连接多半也已失效）
+        """
+        idle, slots = self._queues(key)
+        slots.acquire()
+        try:
+            while fresh:
+                try:
+                    _close_quietly(idle.get_nowait().server)
+                except queue.Empty:
+                    break
+            while True:
+                try:
+                    conn = idle.get_nowait()
+                except queue.Empty:
+                    break
+                if time.monotonic() - conn.last_used > self.idle_timeout:
+                    _close_quietly(conn.server)
+                    continue
+                return conn
+            return _PooledConnection(key, connect())
+        except Exception:
+            slots.release()
+            raise
+
+    def release(self, conn: _PooledConnection, discard: bool = False) -> None:
+        """
+        归还连接
+
+        Args:
+            conn: acquire 借出的连接
+            discard: 为 True 时直接关闭（如连接已断开）
+        """
+        idle, slots = self._queues(conn.key)
+        try:
+            if discard or conn.sent >= self.max_messages:
+                _close_quietly(conn.server)
+            else:
+                conn.last_used = time.monotonic()
+                idle.put(conn)
+        finally:
+            slots.release()
+
+    def _reap_loop(self) -> None:
+        """后台线程：定期关闭超时的空闲连接"""
+        while not self._stop.wait(self.idle_timeout / 2):
+            self._reap(self.idle_timeout)
+
+    def _reap(self, max_idle: float) -> None:
+        with self._lock:
+            idle_queues = list(self._idle.values())
+        now = time.monotonic()
+        for idle in idle_queues:
+            keep = []
+            while True:
+                try:
+                    conn = idle.get_nowait()
+                except queue.Empty:
+                    break
+                if now - conn.last_used >= max_idle:
+                    _close_quietly(conn.server)
+                else:
+                    keep.append(conn)
+            # 逆序放回，保持 LIFO 顺序
+            for conn in reversed(keep):
+                idle.put(conn)
+
+    def close_all(self) -> None:
+        """关闭所有空闲连接并停止回收线程（用于程序退出）"""
+        self._stop.set()
+        with self._lock:
+            reaper, self._reaper = self._reaper, None
+        self._reap(0)
+        if reaper is not None and reaper is not threading.current_thread():
+            reaper.join(timeout=1)
 
 
 class SMTPSender:
     """SMTP 邮件发送"""
 
-    def __init__(self, smtp_host: str, smtp_port: int, smtp_user: str, smtp_password: str):
+    def __init__(
+        self,
+        smtp_host: str,
+        smtp_port: int,
+        smtp_user: str,
+        smtp_password: str,
+        pool: Optional[SMTPConnectionPool] = None
+    ):
         """
         初始化
 
@@ -23,13 +433,128 @@ class SMTPSender:
             smtp_port: SMTP 服务器端口
             smtp_user: SMTP 用户名（邮箱地址）
             smtp_password: SMTP 密码（授权码）
+            pool: SMTP 连接池，默认使用全局共享连接池
         """
         self.smtp_host = smtp_host
         self.smtp_port = smtp_port
         self.smtp_user = smtp_user
         self.smtp_password = smtp_password
+        self.pool = pool or SMTPConnectionPool.instance()
+        self._pool_key: PoolKey = (smtp_host, smtp_port, smtp_user)
+        self._ssl = smtp_port == SMTPS_PORT
+        self._addrinfo: Optional[list] = None
+        self._addrinfo_lock = threading.Lock()
+        self._resolve()
+
+    def _resolve(self, refresh: bool = False) -> Optional[list]:
+        """
+        解析并缓存 SMTP 服务器地址
+
+        Args:
+            refresh: 为 True 时忽略缓存重新解析
 
-    def _parse_recipients(self, to: Union[str, List[str]]) -> List[str]:
+        Returns:
+            getaddrinfo 结果，解析失败时返回 None（连接时由 smtplib 自行解析）
+        """
+        with self._addrinfo_lock:
+            if self._addrinfo is None or refresh:
+                try:
+                    self._addrinfo = socket.getaddrinfo(
+                        self.smtp_host, self.smtp_port, type=socket.SOCK_STREAM
+                    )
+                except socket.gaierror:
+                    self._addrinfo = None
+            return self._addrinfo
+
+    def _connect(self) -> smtplib.SMTP:
+        """建立 SMTP 连接，启用 TLS 并完成登录（465 端口使用隐式 TLS）"""
+        smtp_cls = _PreResolvedSMTP_SSL if self._ssl else _PreResolvedSMTP
+        server = smtp_cls(timeout=SMTP_TIMEOUT)
+        server.resolve = self._resolve
+        try:
+            server.connect(self.smtp_host, self.smtp_port)
+            if not self._ssl:
+                server.starttls()  # 启用 TLS
+            server.login(self.smtp_user, self.smtp_password)
+        except Exception:
+            _close_quietly(server)
+            raise
+        return server
+
+    @staticmethod
+    def _deliver(
+        server: smtplib.SMTP,
+        msg: Union[Message, bytes],
+        from_addr: str,
+        to_addrs: List[str]
+    ) -> None:
+        """
+        发送邮件
+
+        已序列化的 bytes 直接发送，跳过再次编码；服务器支持 PIPELINING 时
+        MAIL/RCPT/DATA 合并为一次往返
+        """
+        if isinstance(msg, Message):
+            if not (from_addr.isascii() and all(addr.isascii() for addr in to_addrs)):
+                # 国际化地址需要 SMTPUTF8，交给 send_message 处理
+                server.send_message(msg, from_addr=from_addr, to_addrs=to_addrs)
+                return
+            msg = msg.as_bytes(policy=msg.policy.clone(linesep='\r\n'))
+
+        server.ehlo_or_helo_if_needed()
+        if server.has_extn('pipelining'):
+            _send_pipelined(server, msg, from_addr, to_addrs)
+        else:
+            server.sendmail(from_addr, to_addrs, msg)
+
+    def _send_pooled(
+        self,
+        msg: Union[Message, bytes],
+        from_addr: str,
+        to_addrs: List[str]
+    ) -> None:
+        """
+        从连接池借出连接发送邮件
+
+        连接已失效（断开、socket 错误或 421）时，丢弃池中空闲连接并用新连接重试一次
+        """
+        conn = self.pool.acquire(self._pool_key, self._connect)
+        try:
+            self._deliver_pooled(conn, msg, from_addr, to_addrs)
+        except Exception as e:
+            if not _is_connection_lost(e):
+                raise
+            conn = self.pool.acquire(self._pool_key, self._connect, fresh=True)
+            self._deliver_pooled(conn, msg, from_addr, to_addrs)
+
+    def _deliver_pooled(
+        self,
+        conn: _PooledConnection,
+        msg: Union[Message, bytes],
+        from_addr: str,
+        to_addrs: List[str]
+    ) -> None:
+        """
+        在借出的连接上发送邮件，结束后归还连接
+
+        只有连接失效时才丢弃；收件人被拒、DATA 失败等错误后会话已 RSET，照常归还复用
+        """
+        try:
+            self._deliver(conn.server, msg, from_addr, to_addrs)
+        except BaseException as e:
+            lost = not isinstance(e, Exception) or _is_connection_lost(e)
+            if not lost:
+                conn.sent += 1
+            self.pool.release(conn, discard=lost)
+            raise
+        conn.sent += 1
+        self.pool.release(conn)
+
+    def _parse_recipients(
+        self,
+        to: Union[str, List[str]],
+        validated: bool = False
+    ) -> List[str]:
         """
         解析收件人列表
 
@@ -39,48 +564,53 @@ class SMTPSender:
                 - 逗号分隔: "user1@example.com, user2@example.com"
                 - 分号分隔: "user1@example.com; user2@example.com"
                 - 列表: ["user1@example.com", "user2@example.com"]
+            validated: 调用方已保证地址有效时传 True，跳过格式校验；
+                to 为列表时直接原样使用
 
         Returns:
-            收件人邮箱列表
+            去重后的收件人邮箱列表（保持原始顺序）
         """
+        if validated and not isinstance(to, str):
+            recipients = list(to)
+        else:
+            recipients = list(self._iter_recipients(to, validated))
+
+        unique = dedup_recipients(recipients)
+        if len(unique) < len(recipients):
+            log.debug("已去除 %d 个重复收件人", len(recipients) - len(unique))
+        return unique
+
+    @staticmethod
+    def _iter_recipients(to: Union[str, List[str]], validated: bool = False) -> Iterator[str]:
+        """逐个产出有效收件人，分割、去空白和校验在同一次遍历中完成"""
         if isinstance(to, str):
-            # 先尝试逗号分割，再尝试分号分割
-            if ',' in to:
-                recipients = [email.strip() for email in to.split(',') if email.strip()]
-            elif ';' in to:
-                recipients = [email.strip() for email in to.split(';') if email.strip()]
-            else:
-                recipients = [to.strip()]
+            # 逗号和分号统一为逗号，一次 split 得到全部片段
+            tokens = to.replace(';', ',').split(',')
         else:
-            # 如果是列表，直接使用
-            recipients = [email.strip() for email in to if email.strip()]
-
-        # 过滤空值和无效邮箱
-        valid_recipients = []
-        for email in recipients:
-            _, addr = parseaddr(email)
-            if addr and '@' in addr and '.' in addr:
-                valid_recipients.append(addr)
+            tokens = to
+
+        for token in tokens:
+            email = token.strip()
+            if not email:
+                continue
+            # 仅当包含尖括号（如 "Name <addr>"）时才需要 parseaddr 提取地址
+            addr = parseaddr(email)[1] if '<' in email else email
+            if validated or is_valid_email(addr):
+                yield addr
             else:
-                print(f"⚠️  跳过无效邮箱格式: {email}")
-
-        return valid_recipients
+                log.warning("⚠️  跳过无效邮箱格式: %s", email)
 
     def _format_from_header(self, from_email: str) -> Optional[str]:
         """格式化 From 头部，确保符合 RFC 格式"""
-        name, addr = parseaddr(from_email)
-        if not addr or '@' not in addr or '.' not in addr:
-            return None
-        if name:
-            return formataddr((name, addr), charset='utf-8')
-        return addr
+        return _parse_from(from_email)[0]
 
     def send_email(
         self,
         to: Union[str, List[str]],
         subject: str,
         html_content: str,
-        from_email: str
+        from_email: str,
+        validated: bool = False
     ) -> Dict:
         """
         发送邮件到多个收件人
@@ -94,12 +624,13 @@ class SMTPSender:
             subject: 邮件标题
             html_content: HTML 内容
             from_email: 发件人邮箱
+            validated: 收件人已校验时传 True，跳过地址格式校验
 
         Returns:
             {"success": bool, "message": str, "recipients": List[str]}
         """
         # 解析收件人
-        recipients = self._parse_recipients(to)
+        recipients = self._parse_recipients(to, validated)
 
         if not recipients:
             return {
@@ -109,38 +640,24 @@ class SMTPSender:
             }
 
         try:
-            print(f"📧 正在通过 SMTP 发送邮件到 {len(recipients)} 个收件人:")
+            log.info("📧 正在通过 SMTP 发送邮件到 %d 个收件人", len(recipients))
             for i, email in enumerate(recipients, 1):
-                print(f"  {i}. {email}")
+                log.debug("  %d. %s", i, email)
 
-            # 创建邮件
-            msg = MIMEMultipart('alternative')
-            formatted_from = self._format_from_header(from_email)
+            formatted_from, from_addr = _parse_from(from_email)
             if not formatted_from:
                 return {
                     "success": False,
                     "message": "无效的发件人邮箱",
                     "recipients": recipients
                 }
-            _, from_addr = parseaddr(from_email)
-            msg['From'] = formatted_from
-            msg['To'] = ", ".join(recipients)
-            msg['Subject'] = Header(subject, 'utf-8')
-
-            # 添加 HTML 内容
-            html_part = MIMEText(html_content, 'html', 'utf-8')
-            msg.attach(html_part)
+            # 创建邮件
+            msg = _build_message(formatted_from, subject, html_content, ", ".join(recipients))
 
-            # 连接 SMTP 服务器
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()  # 启用 TLS
-                server.login(self.smtp_user, self.smtp_password)
-                
-                # 发送邮件
-                server.send_message(msg, from_addr=from_addr, to_addrs=recipients)
+            # 通过连接池发送邮件
+            self._send_pooled(msg, from_addr, recipients)
 
-            print(f"✅ SMTP 邮件发送成功!")
-            print(f"   收件人: {len(recipients)} 个")
+            log.info("✅ SMTP 邮件发送成功! 收件人: %d 个", len(recipients))
 
             return {
                 "success": True,
@@ -150,7 +667,7 @@ class SMTPSender:
 
         except Exception as e:
             error_msg = str(e)
-            print(f"❌ SMTP 邮件发送失败: {error_msg}")
+            log.error("❌ SMTP 邮件发送失败: %s", error_msg)
 
             return {
                 "success": False,
@@ -163,7 +680,8 @@ class SMTPSender:
         to: Union[str, List[str]],
         subject: str,
         html_content: str,
-        from_email: str
+        from_email: str,
+        validated: bool = False
     ) -> List[Dict]:
         """
         批量单独发送（每个收件人单独发送一封邮件）
@@ -175,67 +693,96 @@ class SMTPSender:
             subject: 邮件标题
             html_content: HTML 内容
             from_email: 发件人邮箱
+            validated: 收件人已校验时传 True，跳过地址格式校验
 
         Returns:
             每个收件人的发送结果列表
         """
-        recipients = self._parse_recipients(to)
+        recipients = self._parse_recipients(to, validated)
 
         if not recipients:
-            print("⚠️  没有有效的收件人邮箱")
+            log.warning("⚠️  没有有效的收件人邮箱")
             return []
 
-        results = []
-        success_count = 0
+        formatted_from, from_addr = _parse_from(from_email)
+        if not formatted_from:
+            log.error("❌ 无效的发件人邮箱")
+            return [
+                {"success": False, "email": email, "message": "无效的发件人邮箱"}
+                for email in recipients
+            ]
 
-        print(f"📧 开始批量单独发送，共 {len(recipients)} 个收件人...")
+        # 除 To 以外的内容对所有收件人都相同，只构建和编码一次
+        template = _build_message(formatted_from, subject, html_content)
+        template_bytes = template.as_bytes()
 
-        for email in recipients:
-            try:
-                # 创建邮件
-                msg = MIMEMultipart('alternative')
-                formatted_from = self._format_from_header(from_email)
-                if not formatted_from:
-                    raise ValueError("无效的发件人邮箱")
-                _, from_addr = parseaddr(from_email)
-                msg['From'] = formatted_from
-                msg['To'] = email
-                msg['Subject'] = Header(subject, 'utf-8')
-
-                # 添加 HTML 内容
-                html_part = MIMEText(html_content, 'html', 'utf-8')
-                msg.attach(html_part)
-
-                # 连接 SMTP 服务器
-                with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                    server.starttls()  # 启用 TLS
-                    server.login(self.smtp_user, self.smtp_password)
-                    
-                    # 发送邮件
-                    server.send_message(msg, from_addr=from_addr, to_addrs=[email])
-
-                result = {
-                    "success": True,
-                    "email": email,
-                    "message": "发送成功"
-                }
-                success_count += 1
-                print(f"  ✅ {email}: 发送成功")
+        results: List[Optional[Dict]] = [None] * len(recipients)
 
-            except Exception as e:
-                result = {
-                    "success": False,
-                    "email": email,
-                    "message": str(e)
-                }
-                print(f"  ❌ {email}: 发送失败 - {str(e)}")
+        log.info("📧 开始批量单独发送，共 %d 个收件人...", len(recipients))
 
-            results.append(result)
+        # 并发数不超过连接池上限，多余的线程只会阻塞等待连接
+        max_workers = min(self.pool.max_connections, len(recipients))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._send_one, email, template, template_bytes, from_addr): i
+                for i, email in enumerate(recipients)
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
 
-        print(f"📊 批量发送完成: 成功 {success_count}/{len(recipients)}")
+        log_batch_summary(log, results)
 
+        # 按收件人原始顺序返回
         return results
 
+    def _send_one(
+        self,
+        email: str,
+        template: EmailMessage,
+        template_bytes: bytes,
+        from_addr: str
+    ) -> Dict:
+        """发送单封邮件给一个收件人，返回发送结果"""
+        try:
+            if email.isascii():
+                # 在预编码的邮件前补上 To 头，避免逐个收件人重新编码正文
+                msg: Union[Message, bytes] = b"To: " + email.encode("ascii") + b"\r\n" + template_bytes
+            else:
+                # 非 ASCII 地址交给 send_message 处理（需要 SMTPUTF8）
+                msg = copy.deepcopy(template)
+                msg['To'] = email
+
+            # 连接池内复用同一会话，达到发送上限时自动轮换
+            self._send_pooled(msg, from_addr, [email])
+
+            return {
+                "success": True,
+                "email": email,
+                "message": "发送成功"
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "email": email,
+                "message": str(e)
+            }
+
+
+@lru_cache(maxsize=16)
+def _get_smtp_sender(
+    smtp_host: str,
+    smtp_port: int,
+    smtp_user: str,
+    smtp_password: str
+) -> SMTPSender:
+    """
+    按连接参数缓存 SMTPSender，复用其 DNS 解析结果和连接池中的连接
+
+    SMTPSender 可在多线程间共享：连接由线程安全的连接池借出，地址缓存有锁保护
+    """
+    return SMTPSender(smtp_host, smtp_port, smtp_user, smtp_password)
+
 
 def send_email(
     smtp_host: str,
@@ -247,6 +794,6 @@ def send_email(
     html_content: str,
     from_email: str
 ) -> Dict:
-    """便捷函数：发送邮件到多个收件人"""
-    sender = SMTPSender(smtp_host, smtp_port, smtp_user, smtp_password)
+    """便捷函数：发送邮件到多个收件人（相同连接参数复用同一个 SMTPSender）"""
+    sender = _get_smtp_sender(smtp_host, smtp_port, smtp_user, smtp_password)
     return sender.send_email(to, subject, html_content, from_email)
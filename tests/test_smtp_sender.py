@@ -0,0 +1,301 @@
+"""
+SMTPSender 连接测试
+使用本地桩 SMTP 服务器驱动真实的 smtplib 会话，TLS 握手通过 mock 跳过
+"""
+import smtplib
+import socket
+import ssl
+import threading
+import unittest
+from unittest import mock
+
+from src.smtp_sender import SMTPConnectionPool, SMTPSender, _send_pipelined
+
+
+class _StubSMTPServer:
+    """
+    最小 SMTP 服务器：支持 EHLO / STARTTLS / AUTH / MAIL / RCPT / DATA / RSET / QUIT
+
+    Args:
+        pipelining: 是否在 EHLO 中声明 PIPELINING
+        reject_rcpt: 以这些前缀开头的收件人返回 550
+        reject_mail: 为 True 时 MAIL FROM 返回 550
+    """
+
+    def __init__(self, pipelining=False, reject_rcpt=(), reject_mail=False):
+        self.pipelining = pipelining
+        self.reject_rcpt = tuple(reject_rcpt)
+        self.reject_mail = reject_mail
+        self.commands = []
+        self.messages = []
+        self.connections = 0
+        self._generation = 0
+        self._expired_before = 0
+        self._sessions = []
+        self._threads = []
+        self._sock = socket.socket()
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(8)
+        self.port = self._sock.getsockname()[1]
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._accept_thread.start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            self._generation += 1
+            self._sessions.append(conn)
+            thread = threading.Thread(
+                target=self._serve, args=(conn, self._generation), daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _serve(self, conn, generation):
+        with conn, conn.makefile("rb") as reader:
+            def reply(line):
+                conn.sendall(line.encode("ascii") + b"\r\n")
+
+            mail_ok = False
+            accepted = 0
+            try:
+                reply("220 stub ready")
+                for raw in reader:
+                    command = raw.decode("ascii").strip()
+                    self.commands.append(command)
+                    if generation <= self._expired_before:
+                        # 模拟服务器空闲超时后关闭会话
+                        reply("421 idle timeout, closing")
+                        return
+                    verb = command.split(" ", 1)[0].upper()
+                    if verb == "EHLO":
+                        reply("250-stub")
+                        reply("250-STARTTLS")
+                        if self.pipelining:
+                            reply("250-PIPELINING")
+                        reply("250 AUTH PLAIN LOGIN")
+                    elif verb == "STARTTLS":
+                        reply("220 go ahead")
+                    elif verb == "AUTH":
+                        reply("235 authenticated")
+                    elif verb == "MAIL":
+                        mail_ok = not self.reject_mail
+                        reply("250 ok" if mail_ok else "550 sender rejected")
+                    elif verb == "RCPT":
+                        addr = command.split(":", 1)[1].strip("<> ")
+                        if addr.startswith(self.reject_rcpt or ("\0",)):
+                            reply("550 no such user")
+                        else:
+                            accepted += 1
+                            reply("250 ok")
+                    elif verb == "DATA":
+                        if not mail_ok or not accepted:
+                            reply("554 no valid recipients")
+                            continue
+                        reply("354 go ahead")
+                        lines = []
+                        for data_line in reader:
+                            if data_line == b".\r\n":
+                                break
+                            lines.append(data_line)
+                        self.messages.append(b"".join(lines))
+                        mail_ok, accepted = False, 0
+                        reply("250 queued")
+                    elif verb == "RSET":
+                        mail_ok, accepted = False, 0
+                        reply("250 ok")
+                    elif verb == "QUIT":
+                        reply("221 bye")
+                        return
+                    else:
+                        reply("250 ok")
+            except OSError:
+                return
+
+    def drop_sessions(self):
+        """不发任何响应直接断开所有已建立的会话"""
+        for conn in self._sessions:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def expire_sessions(self):
+        """已建立的会话在收到下一条命令时回复 421 并关闭"""
+        self._expired_before = self._generation
+
+    def close(self):
+        self._sock.close()
+        self.drop_sessions()
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+
+class _StubServerTestCase(unittest.TestCase):
+    """启动桩服务器，并把 TLS 握手替换为记录 SNI 主机名的空操作"""
+
+    server_options = {}
+
+    def setUp(self):
+        self.server = _StubSMTPServer(**self.server_options)
+        self.addCleanup(self.server.close)
+        self.pool = SMTPConnectionPool()
+        self.addCleanup(self.pool.close_all)
+        self.sender = SMTPSender(
+            "localhost", self.server.port, "user@example.com", "secret", pool=self.pool
+        )
+        self.hostnames = []
+
+        def fake_wrap_socket(context, sock, *args, server_hostname=None, **kwargs):
+            # 记录 SNI 主机名，返回原 socket 让会话以明文继续
+            self.hostnames.append(server_hostname)
+            return sock
+
+        patcher = mock.patch.object(ssl.SSLContext, "wrap_socket", fake_wrap_socket)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def verbs(self):
+        return [c.split(" ", 1)[0].upper() for c in self.server.commands]
+
+
+class ConnectTest(_StubServerTestCase):
+    """_connect() 必须带着主机名完成 TLS 和登录"""
+
+    def test_starttls_uses_server_hostname(self):
+        server = self.sender._connect()
+        server.quit()
+
+        self.assertEqual(self.hostnames, ["localhost"])
+        self.assertEqual(self.verbs(), ["EHLO", "STARTTLS", "EHLO", "AUTH", "QUIT"])
+
+    def test_implicit_tls_uses_server_hostname(self):
+        self.sender._ssl = True  # 桩服务器无法监听 465，直接切换到 SMTP_SSL
+
+        server = self.sender._connect()
+        server.quit()
+
+        self.assertEqual(self.hostnames, ["localhost"])
+        self.assertEqual(self.verbs(), ["EHLO", "AUTH", "QUIT"])
+
+
+class PooledSendTest(_StubServerTestCase):
+    """连接池中的连接失效后，重试必须使用新连接"""
+
+    def _warm_pool(self, count):
+        key = self.sender._pool_key
+        conns = [self.pool.acquire(key, self.sender._connect) for _ in range(count)]
+        for conn in conns:
+            self.pool.release(conn)
+
+    def test_retry_skips_stale_idle_connections(self):
+        self._warm_pool(3)
+        self.server.drop_sessions()
+
+        result = self.sender.send_email("a@example.com", "标题", "<p>hi</p>", "user@example.com")
+
+        self.assertTrue(result["success"], result["message"])
+        self.assertEqual(self.server.connections, 4)
+        self.assertEqual(len(self.server.messages), 1)
+
+    def test_421_is_retried_on_new_connection(self):
+        self._warm_pool(1)
+        self.server.expire_sessions()
+
+        result = self.sender.send_email("a@example.com", "标题", "<p>hi</p>", "user@example.com")
+
+        self.assertTrue(result["success"], result["message"])
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(len(self.server.messages), 1)
+
+
+class RefusedRecipientTest(_StubServerTestCase):
+    """收件人被拒后会话仍可用，连接应归还连接池继续复用"""
+
+    server_options = {"reject_rcpt": ("bad",)}
+
+    def test_refused_recipient_keeps_connection(self):
+        results = [
+            self.sender.send_email(to, "标题", "<p>hi</p>", "user@example.com")
+            for to in ("bad@example.com", "a@example.com", "bad@example.com", "b@example.com")
+        ]
+
+        self.assertEqual([r["success"] for r in results], [False, True, False, True])
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(self.server.messages), 2)
+
+
+class PipelinedSendTest(_StubServerTestCase):
+    """服务器声明 PIPELINING 时的批量命令发送"""
+
+    server_options = {"pipelining": True, "reject_rcpt": ("bad",)}
+    message = b"Subject: test\r\n\r\n.hidden\r\nbody\r\n"
+
+    def setUp(self):
+        super().setUp()
+        self.smtp = self.sender._connect()
+        self.addCleanup(self.smtp.close)
+
+    def send(self, *to_addrs):
+        return _send_pipelined(self.smtp, self.message, "user@example.com", list(to_addrs))
+
+    def test_partial_refusal_delivers_to_accepted(self):
+        refused = self.send("a@example.com", "bad@example.com")
+
+        self.assertEqual(list(refused), ["bad@example.com"])
+        self.assertEqual(refused["bad@example.com"][0], 550)
+        self.assertEqual(len(self.server.messages), 1)
+
+    def test_all_recipients_refused_resets_session(self):
+        with self.assertRaises(smtplib.SMTPRecipientsRefused) as cm:
+            self.send("bad1@example.com", "bad2@example.com")
+
+        self.assertEqual(set(cm.exception.recipients), {"bad1@example.com", "bad2@example.com"})
+        self.assertEqual(self.verbs()[-1], "RSET")
+        # 会话保持同步，可继续发送
+        self.assertEqual(self.send("a@example.com"), {})
+        self.assertEqual(len(self.server.messages), 1)
+
+    def test_sender_refused(self):
+        self.server.reject_mail = True
+
+        with self.assertRaises(smtplib.SMTPSenderRefused):
+            self.send("a@example.com")
+
+        self.assertEqual(self.verbs()[-1], "RSET")
+        self.assertEqual(self.server.messages, [])
+
+    def test_leading_dot_is_stuffed(self):
+        self.send("a@example.com")
+
+        self.assertEqual(self.server.messages, [b"Subject: test\r\n\r\n..hidden\r\nbody\r\n"])
+
+    def test_broken_pipe_raises_server_disconnected(self):
+        self.smtp.sock.close()
+        self.smtp.sock = mock.Mock(**{"sendall.side_effect": BrokenPipeError()})
+
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            self.send("a@example.com")
+
+        self.assertIsNone(self.smtp.sock)
+
+    def test_broken_pipe_on_reused_connection_reconnects(self):
+        conn = self.pool.acquire(self.sender._pool_key, self.sender._connect)
+        conn.server.sock.close()
+        conn.server.sock = mock.Mock(**{"sendall.side_effect": BrokenPipeError()})
+        self.pool.release(conn)
+
+        result = self.sender.send_email("a@example.com", "标题", "<p>hi</p>", "user@example.com")
+
+        self.assertTrue(result["success"], result["message"])
+        # setUp 中的会话 + 池中被换成坏 socket 的会话 + 重连
+        self.assertEqual(self.server.connections, 3)
+        self.assertEqual(len(self.server.messages), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()